@@ -5,21 +5,61 @@ This plugin fetches random XKCD comics and formats them for display
 on e-ink devices.
 """
 
+import json
 import logging
+import os
+import queue
 import random
-import subprocess
+import shutil
+import struct
 import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from threading import Lock, Thread
 from typing import Optional, Tuple, Union
 
+import numpy as np
 import requests
-from PIL import Image
+from PIL import Image, ImageColor, ImageDraw
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from plugins.base_plugin.base_plugin import BasePlugin
+from utils.app_utils import get_font
 
 logger = logging.getLogger(__name__)
 
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Probability of drawing a candidate from the known-suitable set, once it
+# holds enough comics to keep renders varied
+SUITABLE_BIAS = 0.7
+MIN_SUITABLE_POOL = 20
+
+# How long the latest comic number stays fresh before it is refetched
+LATEST_COMIC_TTL = 6 * 60 * 60  # seconds
+
+# Minimum spacing between requests to xkcd.com across all probe threads
+MIN_REQUEST_INTERVAL = 0.25  # seconds
+
+# How many validated comics to keep warm, and how long the prefetcher
+# idles between fetches
+PREFETCH_QUEUE_SIZE = 5
+PREFETCH_INTERVAL = 30  # seconds
+
+# Cap on cached comic images so the cache cannot fill the filesystem
+MAX_CACHED_IMAGES = 200
+
+_FONT_CACHE = {}
+
+
+def _title_font(size: int = 20):
+    """Return the font used for comic titles, loading it once per size."""
+    if size not in _FONT_CACHE:
+        _FONT_CACHE[size] = get_font("Jost", size)
+    return _FONT_CACHE[size]
+
 
 class XKCD(BasePlugin):
     """
@@ -38,8 +78,47 @@ class XKCD(BasePlugin):
             **dependencies: Additional dependencies
         """
         self.config = config
-        self.latest_comic = self._get_latest_comic_num()
-        self.temp_dir = Path(tempfile.gettempdir())
+        self._session = self._build_session()
+        self._latest_comic = None
+        self._latest_fetched_at = 0.0
+        # Comics are immutable once published, so metadata and images can
+        # be cached on disk indefinitely
+        self._cache_dir = Path(tempfile.gettempdir()) / "inkypi_xkcd"
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        self._info_cache = {}
+        self._suitable_lock = Lock()
+        self._suitable_set = self._load_suitable_set()
+        self._request_lock = Lock()
+        self._last_request_ts = 0.0
+        self._prefetch_queue = queue.Queue(maxsize=PREFETCH_QUEUE_SIZE)
+        self._prefetch_thread = None
+        self._palette_image = None
+        self._palette_colors = None
+
+    @staticmethod
+    def _build_session() -> requests.Session:
+        """
+        Build a requests session shared by all xkcd.com calls.
+
+        Keep-alive lets every request after the first reuse the same
+        TCP+TLS connection instead of paying a fresh handshake.
+
+        Returns:
+            requests.Session: Configured session with pooling and retries
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(
+                total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504]
+            ),
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["User-Agent"] = "InkyPi-XKCD/1.0"
+        session.headers["Accept-Encoding"] = "gzip"
+        return session
 
     def generate_image(self, settings, device_config) -> Image.Image:
         """
@@ -56,18 +135,124 @@ class XKCD(BasePlugin):
             RuntimeError: If comic retrieval or processing fails
         """
         try:
-            image_path, title = self._get_random_comic()
+            self._ensure_prefetcher()
+            try:
+                image_path, title = self._prefetch_queue.get_nowait()
+            except queue.Empty:
+                image_path, title = self._get_random_comic()
             if not image_path:
                 raise RuntimeError("Failed to get a suitable comic.")
 
-            processed_image_path = self._process_image(image_path, title=title)
-            if not processed_image_path:
+            processed_image = self._process_image(image_path, title=title)
+            if not processed_image:
+                self._discard_comic(image_path)
                 raise RuntimeError("Failed to process comic image.")
 
-            return Image.open(processed_image_path)
+            return self._apply_display_palette(processed_image, device_config)
         except Exception as e:
             logger.error(f"Error generating XKCD image: {e}")
             raise RuntimeError(f"Error generating XKCD image: {e}")
+        finally:
+            self._prune_cache()
+
+    def _prune_cache(self) -> None:
+        """
+        Cap the comic cache so disk usage stays bounded.
+
+        Keeps the most recently downloaded images and unlinks the rest.
+        The per-comic metadata files are a few hundred bytes each and
+        are left alone. Run after every render, so the cache on a
+        long-running device never grows without limit.
+        """
+        try:
+            images = sorted(
+                (p for p in self._cache_dir.iterdir() if p.suffix != ".json"),
+                key=lambda p: p.stat().st_mtime,
+                reverse=True,
+            )
+            for stale in images[MAX_CACHED_IMAGES:]:
+                stale.unlink(missing_ok=True)
+        except Exception as e:
+            logger.warning(f"Error pruning comic cache: {e}")
+
+    def _throttle(self) -> None:
+        """
+        Space out requests to xkcd.com.
+
+        Sleeps only for however long is needed to keep at least
+        MIN_REQUEST_INTERVAL between consecutive requests, shared
+        across all probe threads. Replaces the old unconditional
+        one-second sleep between attempts.
+        """
+        with self._request_lock:
+            wait = MIN_REQUEST_INTERVAL - (time.monotonic() - self._last_request_ts)
+            if wait > 0:
+                time.sleep(wait)
+            self._last_request_ts = time.monotonic()
+
+    @property
+    def latest_comic(self) -> int:
+        """
+        The number of the latest XKCD comic.
+
+        Fetched lazily on first use and cached for a few hours, so
+        constructing the plugin never blocks on the network.
+        """
+        now = time.monotonic()
+        if self._latest_comic is None or now - self._latest_fetched_at > LATEST_COMIC_TTL:
+            self._latest_comic = self._get_latest_comic_num()
+            self._latest_fetched_at = now
+        return self._latest_comic
+
+    def _apply_display_palette(
+        self, image: Image.Image, device_config
+    ) -> Image.Image:
+        """
+        Quantize the image to the display palette when one is configured.
+
+        E-ink panels only show a handful of colors; quantizing here with
+        dithering means downstream display code gets an 8-bit paletted
+        image instead of making its own pass over full 24-bit RGB data.
+        The image is returned unchanged when no palette is configured or
+        the display is 24-bit color.
+
+        Args:
+            image: The composited comic image
+            device_config: Device configuration
+
+        Returns:
+            The quantized image, or the original if no palette applies
+        """
+        palette = device_config.get_config("display_palette", default=None)
+        if not palette or device_config.get_config("color_depth", default=24) == 24:
+            return image
+
+        if palette != self._palette_colors:
+            palette_image = Image.new("P", (1, 1))
+            palette_image.putpalette(
+                [channel for color in palette for channel in color]
+            )
+            self._palette_image = palette_image
+            self._palette_colors = palette
+
+        return image.quantize(
+            palette=self._palette_image, dither=Image.Dither.FLOYDSTEINBERG
+        )
+
+    def _store_latest(self, future) -> None:
+        """
+        Cache the result of a background latest-comic refresh.
+
+        Args:
+            future: Completed future holding the latest comic number
+        """
+        if future.cancelled():
+            return
+        try:
+            self._latest_comic = future.result()
+            self._latest_fetched_at = time.monotonic()
+        except Exception as e:
+            logger.error(f"Error refreshing latest comic number: {e}")
 
     def _get_latest_comic_num(self) -> int:
         """
@@ -77,7 +262,8 @@ class XKCD(BasePlugin):
             int: The number of the latest comic or a fallback value
         """
         try:
-            response = requests.get("https://xkcd.com/info.0.json", timeout=10)
+            self._throttle()
+            response = self._session.get("https://xkcd.com/info.0.json", timeout=10)
             response.raise_for_status()
             return response.json()["num"]
         except Exception as e:
@@ -88,110 +274,355 @@ class XKCD(BasePlugin):
         """
         Get the metadata for a specific comic number.
 
+        Checks the in-process and on-disk caches before hitting the
+        network; fetched metadata is written back to both.
+
         Args:
             num: Comic number to retrieve
 
         Returns:
             dict: Comic metadata or None if retrieval failed
         """
+        if num in self._info_cache:
+            return self._info_cache[num]
+
+        info_path = self._cache_dir / f"{num}.json"
+        if info_path.is_file():
+            try:
+                comic_info = json.loads(info_path.read_text())
+                self._info_cache[num] = comic_info
+                return comic_info
+            except Exception as e:
+                logger.warning(f"Discarding unreadable cached info for {num}: {e}")
+
         try:
-            response = requests.get(f"https://xkcd.com/{num}/info.0.json", timeout=10)
+            self._throttle()
+            response = self._session.get(f"https://xkcd.com/{num}/info.0.json", timeout=10)
             response.raise_for_status()
-            return response.json()
+            comic_info = response.json()
+            self._info_cache[num] = comic_info
+            info_path.write_text(json.dumps(comic_info))
+            return comic_info
         except Exception as e:
             logger.error(f"Error getting comic {num} info: {e}")
             return None
 
-    def _download_image(self, url: str, output_path: Path) -> bool:
+    def _image_dimensions(self, head: bytes) -> Optional[Tuple[int, int]]:
+        """
+        Read image dimensions from the leading bytes of an image file.
+
+        Dispatches on the magic bytes and parses the format header
+        directly (PNG IHDR, JPEG SOF, GIF logical screen descriptor),
+        so no image decoder is involved at all.
+
+        Args:
+            head: The first bytes of the image file
+
+        Returns:
+            Tuple of (width, height) or None if they could not be read
+        """
+        if head[:8] == PNG_SIGNATURE and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:2] == b"\xff\xd8":
+            return self._jpeg_dimensions(head)
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        logger.error("Unrecognized image format, cannot read dimensions")
+        return None
+
+    @staticmethod
+    def _jpeg_dimensions(head: bytes) -> Optional[Tuple[int, int]]:
+        """
+        Scan JPEG segments for a start-of-frame marker and read its size.
+
+        Args:
+            head: The first bytes of the JPEG file
+
+        Returns:
+            Tuple of (width, height) or None if no SOF marker was found
+        """
+        offset = 2
+        while offset + 9 <= len(head) and head[offset] == 0xFF:
+            marker = head[offset + 1]
+            length = struct.unpack(">H", head[offset + 2:offset + 4])[0]
+            # SOF0-SOF15, excluding the DHT/JPG/DAC markers in that range
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack(">HH", head[offset + 5:offset + 9])
+                return width, height
+            offset += 2 + length
+        return None
+
+    def _is_suitable(self, width: int, height: int) -> bool:
+        """
+        Check if image dimensions are suitable for display on the device.
+
+        Checks size and aspect ratio to ensure the comic will display
+        well on e-ink screens.
+
+        Args:
+            width: Image width in pixels
+            height: Image height in pixels
+
+        Returns:
+            bool: True if the image is suitable, False otherwise
         """
-        Download an image from URL to the specified path.
+        return (
+            width > (height * 1.2)  # Is horizontal
+            and 250 < width < 1000
+            and 250 < height < 600
+        )
+
+    def _download_if_suitable(self, url: str, output_path: Path) -> bool:
+        """
+        Stream an image to disk, stopping early if it is unsuitable.
+
+        Only the header bytes are read before deciding suitability, so a
+        rejected comic costs under a kilobyte of transfer instead of the
+        full image; the connection is released back to the pool.
 
         Args:
             url: Image URL to download
             output_path: Path to save the image to
 
         Returns:
-            bool: True if download was successful, False otherwise
+            bool: True if the image was suitable and saved, False otherwise
         """
+        temp_path = None
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            with open(output_path, "wb") as f:
-                f.write(response.content)
-            return True
+            self._throttle()
+            with self._session.get(url, stream=True, timeout=10) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+
+                head = response.raw.read(33)  # PNG signature + IHDR chunk
+                if not (head[:8] == PNG_SIGNATURE and head[12:16] == b"IHDR"):
+                    # Not a PNG; read enough to cover the JPEG/GIF header
+                    head += response.raw.read(65536)
+
+                dimensions = self._image_dimensions(head)
+                if dimensions is None or not self._is_suitable(*dimensions):
+                    return False
+
+                # Stream the remainder in chunks into a temporary file
+                # and move it into place only once the copy completes,
+                # so a failure mid-body cannot leave a truncated image
+                # in the cache
+                with tempfile.NamedTemporaryFile(
+                    dir=self._cache_dir, suffix=".part", delete=False
+                ) as f:
+                    temp_path = Path(f.name)
+                    f.write(head)
+                    shutil.copyfileobj(response.raw, f, length=65536)
+                os.replace(temp_path, output_path)
+                return True
         except Exception as e:
             logger.error(f"Error downloading image: {e}")
+            if temp_path is not None:
+                temp_path.unlink(missing_ok=True)
             return False
 
-    def _is_suitable(self, image_path: Path) -> bool:
+    def _load_suitable_set(self) -> set:
         """
-        Check if image is suitable for display on the device.
+        Load the set of comic numbers known to pass the suitability check.
 
-        Checks dimensions and aspect ratio to ensure the comic
-        will display well on e-ink screens.
+        Returns:
+            set: Comic numbers that displayed well in previous runs
+        """
+        suitable_path = self._cache_dir / "suitable.json"
+        try:
+            if suitable_path.is_file():
+                return set(json.loads(suitable_path.read_text()))
+        except Exception as e:
+            logger.warning(f"Discarding unreadable suitable set: {e}")
+        return set()
+
+    def _record_suitable(self, num: int) -> None:
+        """
+        Remember that a comic passed the suitability check.
 
         Args:
-            image_path: Path to the image file
+            num: Comic number to record
+        """
+        with self._suitable_lock:
+            if num in self._suitable_set:
+                return
+            self._suitable_set.add(num)
+            try:
+                suitable_path = self._cache_dir / "suitable.json"
+                suitable_path.write_text(json.dumps(sorted(self._suitable_set)))
+            except Exception as e:
+                logger.warning(f"Error persisting suitable set: {e}")
+
+    def _discard_comic(self, image_path: Path) -> None:
+        """
+        Drop a cached comic whose image failed to process.
 
-        Returns:
-            bool: True if the image is suitable, False otherwise
+        A corrupt cache entry would otherwise pass the header-based
+        suitability check on every probe; remove the file and forget its
+        number so one bad entry cannot break renders indefinitely.
+
+        Args:
+            image_path: Path of the cached comic image to discard
         """
         try:
-            with Image.open(image_path) as img:
-                return (
-                    img.width > (img.height * 1.2)  # Is horizontal
-                    and 250 < img.width < 1000
-                    and 250 < img.height < 600
-                )
+            image_path.unlink(missing_ok=True)
+            num = int(image_path.stem)
+            with self._suitable_lock:
+                if num in self._suitable_set:
+                    self._suitable_set.remove(num)
+                    suitable_path = self._cache_dir / "suitable.json"
+                    suitable_path.write_text(json.dumps(sorted(self._suitable_set)))
         except Exception as e:
-            logger.error(f"Error checking image suitability: {e}")
-            return False
+            logger.warning(f"Error discarding cached comic {image_path}: {e}")
 
-    def _get_random_comic(self, max_attempts=10) -> Optional[Tuple[Path, str]]:
+    def _pick_candidates(self, count: int, latest: int) -> list:
         """
-        Get a random horizontal XKCD comic and its title.
+        Pick distinct comic numbers to probe.
 
-        Tries multiple comics to find one with suitable dimensions.
+        Early comics are mostly single-panel verticals that fail the
+        suitability check, so a uniform draw wastes attempts. Once enough
+        known-good comics have accumulated, most candidates are drawn
+        from that set and the rest stay uniform to keep discovering new
+        ones.
 
         Args:
-            max_attempts: Maximum number of comics to try
+            count: Number of candidates to pick
+            latest: Upper bound for the uniform draw
 
         Returns:
-            Tuple of (image path, title) or None if no suitable comic found
+            list: Distinct comic numbers to probe
         """
-        attempts = 0
-        while attempts < max_attempts:
-            attempts += 1
+        suitable = sorted(self._suitable_set)
+        candidates = []
+        seen = set()
+        attempts_left = count * 20  # Bail out if the pools are tiny
+        while len(candidates) < count and attempts_left > 0:
+            attempts_left -= 1
+            if len(suitable) >= MIN_SUITABLE_POOL and random.random() < SUITABLE_BIAS:
+                num = random.choice(suitable)
+            else:
+                num = random.randint(1, latest)
+            if num not in seen:
+                seen.add(num)
+                candidates.append(num)
+        return candidates
+
+    def _probe_comic(self, num: int) -> Optional[Tuple[Path, str]]:
+        """
+        Fetch a single comic and check whether it is displayable.
+
+        The image is served from the on-disk cache when present, so
+        re-probing a previously seen comic costs no network traffic.
 
-            # Generate random number between 1 and latest comic
-            num = random.randint(1, self.latest_comic)
-            logger.info(f"Trying comic #{num} (attempt {attempts}/{max_attempts})")
+        Args:
+            num: Comic number to probe
 
-            # Get comic info
-            comic_info = self._get_comic_info(num)
-            if not comic_info:
-                continue
+        Returns:
+            Tuple of (image path, title) or None if the comic is unsuitable
+        """
+        comic_info = self._get_comic_info(num)
+        if not comic_info:
+            return None
 
-            # Download image
-            image_url = comic_info["img"]
-            temp_image_path = self.temp_dir / f"xkcd_{num}.png"
+        image_url = comic_info["img"]
+        image_path = self._cache_dir / f"{num}{Path(image_url).suffix or '.png'}"
 
-            if not self._download_image(image_url, temp_image_path):
-                continue
+        if image_path.is_file():
+            with open(image_path, "rb") as f:
+                dimensions = self._image_dimensions(f.read(65536))
+            suitable = dimensions is not None and self._is_suitable(*dimensions)
+        else:
+            suitable = self._download_if_suitable(image_url, image_path)
 
-            if self._is_suitable(temp_image_path):
-                logger.info(f"Found suitable comic: #{num} - {comic_info['title']}")
-                return temp_image_path, comic_info["safe_title"]
+        if not suitable:
+            logger.info(f"Comic #{num} is not suitable")
+            return None
+
+        self._record_suitable(num)
+        logger.info(f"Found suitable comic: #{num} - {comic_info['title']}")
+        return image_path, comic_info["safe_title"]
+
+    def _get_random_comic(self, max_attempts=10) -> Optional[Tuple[Path, str]]:
+        """
+        Get a random horizontal XKCD comic and its title.
+
+        Probes several random comics concurrently and returns the first
+        one with suitable dimensions, so the wall time is bounded by the
+        slowest in-flight request instead of the sum of all attempts.
+        Candidates are biased toward comics that passed the suitability
+        check in earlier runs.
+
+        Args:
+            max_attempts: Maximum number of comics to try
+
+        Returns:
+            Tuple of (image path, title) or None if no suitable comic found
+        """
+        # A small worker pool keeps the request rate to xkcd.com polite
+        executor = ThreadPoolExecutor(max_workers=5)
+        try:
+            # When the latest comic number is stale, refresh it on the
+            # pool alongside the probes instead of blocking on it first;
+            # the stale (or fallback) bound is good enough for sampling,
+            # and any candidate past the real latest just 404s its probe
+            if self._latest_comic is None or (
+                time.monotonic() - self._latest_fetched_at > LATEST_COMIC_TTL
+            ):
+                executor.submit(self._get_latest_comic_num).add_done_callback(
+                    self._store_latest
+                )
+                latest = self._latest_comic or 3000
             else:
-                logger.info(f"Comic #{num} is not suitable, trying another...")
-                if temp_image_path.exists():
-                    temp_image_path.unlink()  # Clean up
+                latest = self._latest_comic
+
+            nums = self._pick_candidates(max_attempts, latest)
+            logger.info(f"Probing comics {nums} concurrently")
+
+            futures = {executor.submit(self._probe_comic, num): num for num in nums}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Error probing comic {futures[future]}: {e}")
+                    continue
+                if result:
+                    return result
+
+            logger.error("Failed to find suitable comic after maximum attempts")
+            return None
+        finally:
+            # Drop queued probes as soon as a winner is found; in-flight
+            # requests finish in the background without blocking the render
+            executor.shutdown(wait=False, cancel_futures=True)
 
-            # Be nice to the XKCD server
-            time.sleep(1)
+    def _ensure_prefetcher(self) -> None:
+        """
+        Start the background prefetch thread if it is not running.
 
-        logger.error("Failed to find suitable comic after maximum attempts")
-        return None
+        Started on first render rather than in __init__ so that plugins
+        which are registered but never displayed generate no traffic.
+        """
+        if self._prefetch_thread is None or not self._prefetch_thread.is_alive():
+            self._prefetch_thread = Thread(target=self._prefetch_loop, daemon=True)
+            self._prefetch_thread.start()
+
+    def _prefetch_loop(self) -> None:
+        """
+        Keep a small pool of validated comics ready for display.
+
+        Runs in a daemon thread, topping up the prefetch queue during
+        idle time so renders can skip the network entirely and pay only
+        for local image processing.
+        """
+        while True:
+            try:
+                if not self._prefetch_queue.full():
+                    result = self._get_random_comic()
+                    if result:
+                        self._prefetch_queue.put(result)
+            except Exception as e:
+                logger.error(f"Error prefetching comic: {e}")
+            time.sleep(PREFETCH_INTERVAL)
 
     def _process_image(
         self,
@@ -199,12 +630,14 @@ class XKCD(BasePlugin):
         title: Optional[str] = None,
         padding: int = 10,
         bg_color: str = "white",
-    ) -> Optional[Path]:
+    ) -> Optional[Image.Image]:
         """
         Process a comic image for optimal display.
 
-        Scales, crops, and adds padding to the image to fit the display
-        dimensions. Optionally adds the comic title to the top center.
+        Scales the image down (never up) to fit the display, centers it
+        on a padded background and optionally draws the comic title at
+        the top center. Done entirely in PIL, so no ffmpeg subprocess is
+        spawned and the pixels are only decoded once.
 
         Args:
             image_path: Path to the source image
@@ -213,63 +646,50 @@ class XKCD(BasePlugin):
             bg_color: Background color for padding
 
         Returns:
-            Path to the processed image or None if processing failed
+            The processed PIL image or None if processing failed
         """
-        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp_file:
-            output_path = Path(tmp_file.name)
-
         # Target dimensions
         target_width = 800
         target_height = 480
         inner_width = target_width - (padding * 2)
         inner_height = target_height - (padding * 2)
 
-        # First, remove alpha channel and scale down if necessary (but never up)
-        filter_chain = [
-            "format=rgb24",  # Convert to RGB (remove alpha)
-        ]
-
-        # Add scaling only if image is larger than inner dimensions
-        filter_chain.append(
-            f"scale='min({inner_width},iw)':'min({inner_height},ih)':force_original_aspect_ratio=decrease"
-        )
-
-        # Center the image and add padding
-        filter_chain.extend(
-            [
-                f"pad={inner_width}:{inner_height}:(ow-iw)/2:(oh-ih)/2:color={bg_color}",
-                f"pad={target_width}:{target_height}:{padding}:{padding}:color={bg_color}",
-            ]
-        )
-
-        # Add title to top center if provided
-        if title:
-            # Sanitize title for FFmpeg (escape single quotes)
-            safe_title = title.replace("'", "\\'")
-            # Position for title text
-            title_y_position = padding + 20
-            # Add text overlay
-            filter_chain.append(
-                f"drawtext=text='{safe_title}':fontcolor=black:fontsize=20:"
-                f"x=(w-text_w)/2:y={title_y_position}"
+        try:
+            img = Image.open(image_path)
+            if img.format == "JPEG":
+                # Let libjpeg decode straight to a reduced scale instead
+                # of decoding full resolution and throwing pixels away
+                img.draft("RGB", (inner_width, inner_height))
+
+            # Remove alpha channel and scale down if necessary (but never up)
+            img = img.convert("RGB")
+            img.thumbnail((inner_width, inner_height), Image.LANCZOS)
+
+            # Center the image on the padded background, assembled in a
+            # single pre-filled buffer rather than a fill-then-paste pass
+            buffer = np.full(
+                (target_height, target_width, 3),
+                ImageColor.getrgb(bg_color),
+                dtype=np.uint8,
             )
+            x = (target_width - img.width) // 2
+            y = (target_height - img.height) // 2
+            buffer[y:y + img.height, x:x + img.width] = np.asarray(img)
+            canvas = Image.fromarray(buffer, "RGB")
+
+            # Add title to top center if provided
+            if title:
+                draw = ImageDraw.Draw(canvas)
+                font = _title_font(20)
+                title_width = draw.textlength(title, font=font)
+                draw.text(
+                    ((target_width - title_width) // 2, padding + 20),
+                    title,
+                    fill="black",
+                    font=font,
+                )
 
-        cmd = [
-            "ffmpeg",
-            "-i",
-            str(image_path),
-            "-vf",
-            ",".join(filter_chain),
-            "-y",
-            str(output_path),
-        ]
-
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-            if result.returncode != 0:
-                logger.error(f"FFmpeg error: {result.stderr}")
-                return None
-            return output_path
+            return canvas
         except Exception as e:
             logger.error(f"Error during image processing: {e}")
             return None